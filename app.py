@@ -1,14 +1,21 @@
 from flask import Flask, render_template, request, redirect, url_for, flash
-from train import run_simulation_and_save, load_history_df, get_history_entry, simulate_sir, plot_sir
+from train import run_simulation_and_save, load_history_df, get_history_entry, plot_sir_cached
 import pandas as pd
 import os
+from types import MappingProxyType
 
 app = Flask(__name__)
 app.secret_key = "replace-this-with-a-secure-secret"
 
+
 # -------------------------
 # Home: input form
 # -------------------------
+# nilai default form; dipakai langsung jika tidak ada query args (read-only view)
+_DEFAULT_PREFILL = MappingProxyType({"beta": "0.3", "gamma": "0.1", "N": "1000000", "I0": "10",
+                                     "R0": "0", "days": "100", "signal_type": "none"})
+# nama query arg yang berbeda dari key prefill (lihat route rerun)
+_PREFILL_ARGS = {"signal_type": "signal"}
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -16,15 +23,11 @@ def index():
     # If rerun parameters passed via query args, prefill form
     prefill = {}
     if request.method == "GET":
-        prefill = {
-            "beta": request.args.get("beta", "0.3"),
-            "gamma": request.args.get("gamma", "0.1"),
-            "N": request.args.get("N", "1000000"),
-            "I0": request.args.get("I0", "10"),
-            "R0": request.args.get("R0", "0"),
-            "days": request.args.get("days", "100"),
-            "signal_type": request.args.get("signal", "none")
-        }
+        if not request.args:
+            prefill = _DEFAULT_PREFILL
+        else:
+            prefill = {k: request.args.get(_PREFILL_ARGS.get(k, k), v)
+                       for k, v in _DEFAULT_PREFILL.items()}
 
     if request.method == "POST":
         try:
@@ -40,9 +43,11 @@ def index():
             step_time_val = request.form.get("step_time", "")
             step_time = float(step_time_val) if step_time_val else None
 
-            # run sim + save history
+            # run sim + save history; plot tidak dirender di sini karena halaman
+            # detail (tujuan redirect) merender sekali lewat plot_sir_cached
             result = run_simulation_and_save(beta=beta, gamma=gamma, N=N, I0=I0, R0=R0,
-                                             days=days, signal_type=signal_type, amp=amp, freq=freq, step_time=step_time)
+                                             days=days, signal_type=signal_type, amp=amp, freq=freq, step_time=step_time,
+                                             render_plot=False)
             entry_id = result["id"]
             return redirect(url_for("history_detail", entry_id=entry_id))
 
@@ -74,19 +79,26 @@ def history():
     if df.empty:
         return render_template("history.html", table=[])
 
-    # Sort terbaru dulu
+    # Sort terbaru dulu (timestamp_readable sudah diisi oleh load_history_df)
     df = df.sort_values("timestamp", ascending=False).reset_index(drop=True)
-
-    # convert timestamp to readable
-    if "timestamp" in df.columns:
-        df["timestamp_readable"] = pd.to_datetime(
-            df["timestamp"]).dt.strftime("%Y-%m-%d %H:%M:%S")
     return render_template("history.html", table=df.to_dict(orient="records"))
 
 
 # -------------------------
 # History detail (view summary + plot + rerun)
 # -------------------------
+def _safe_num(v, cast=float, default=None):
+    """
+    Konversi nilai kolom history ke angka; kosong/NaN/tidak valid -> default.
+    """
+    if v is None or v is pd.NA or v == "" or (isinstance(v, float) and v != v):
+        return default
+    try:
+        return cast(v)
+    except (TypeError, ValueError):
+        return default
+
+
 @app.route("/history/<entry_id>")
 def history_detail(entry_id):
     entry = get_history_entry(entry_id)
@@ -94,7 +106,8 @@ def history_detail(entry_id):
         flash("Riwayat tidak ditemukan.", "warning")
         return redirect(url_for("history"))
 
-    # regenerate plot from parameters (so plot interactive always available)
+    # regenerate plot from parameters (so plot interactive always available);
+    # HTML di-cache di disk per kombinasi parameter
     beta = float(entry["beta"])
     gamma = float(entry["gamma"])
     N = float(entry["N"])
@@ -102,20 +115,17 @@ def history_detail(entry_id):
     R0 = float(entry["R0"])
     days = int(entry["days"])
     signal = entry.get("signal", "none")
-    amp = float(entry.get("amp", 0.5)) if entry.get("amp", "") != "" else 0.5
-    freq = float(entry.get("freq", 1.0)) if entry.get(
-        "freq", "") != "" else 1.0
-    step_time = float(entry.get("step_time")) if entry.get(
-        "step_time", "") != "" else None
+    amp = _safe_num(entry.get("amp"), float, 0.5)
+    freq = _safe_num(entry.get("freq"), float, 1.0)
+    step_time = _safe_num(entry.get("step_time"), float, None)
 
-    t, S, I, R, u = simulate_sir(beta=beta, gamma=gamma, N=N, I0=I0, R0=R0,
-                                 days=days, signal_type=signal, amp=amp, freq=freq, step_time=step_time)
-    plot_html = plot_sir(t, S, I, R, u, signal, beta, gamma, N)
+    plot_html = plot_sir_cached(beta=beta, gamma=gamma, N=N, I0=I0, R0=R0,
+                                days=days, signal_type=signal, amp=amp, freq=freq, step_time=step_time)
 
     # prepare entry dict for template
     display_entry = {
         "id": entry["id"],
-        "timestamp": pd.to_datetime(entry["timestamp"]).strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": entry["timestamp_readable"],
         "beta": beta,
         "gamma": gamma,
         "N": int(float(N)),
@@ -126,11 +136,11 @@ def history_detail(entry_id):
         "amp": amp,
         "freq": freq,
         "step_time": step_time,
-        "peak_I": int(float(entry.get("peak_I"))) if entry.get("peak_I", "") != "" else None,
-        "peak_day": float(entry.get("peak_day")) if entry.get("peak_day", "") != "" else None,
-        "final_S": int(float(entry.get("final_S"))) if entry.get("final_S", "") != "" else None,
-        "final_I": int(float(entry.get("final_I"))) if entry.get("final_I", "") != "" else None,
-        "final_R": int(float(entry.get("final_R"))) if entry.get("final_R", "") != "" else None,
+        "peak_I": _safe_num(entry.get("peak_I"), int),
+        "peak_day": _safe_num(entry.get("peak_day"), float),
+        "final_S": _safe_num(entry.get("final_S"), int),
+        "final_I": _safe_num(entry.get("final_I"), int),
+        "final_R": _safe_num(entry.get("final_R"), int),
         "summary": entry.get("summary", "")
     }
 
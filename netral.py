@@ -1,5 +1,8 @@
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import os
+import csv
+from openpyxl import load_workbook
 from datetime import datetime
 
 # ==============================
@@ -22,20 +25,38 @@ def export_all_sheets(excel_path=EXCEL_FILE, output_dir=EXPORT_DIR):
     os.makedirs(output_dir, exist_ok=True)
 
     print(f"📥 Membaca semua sheet dari: {excel_path}")
-    sheets = pd.read_excel(excel_path, sheet_name=None, header=None)
-    print(f"📚 Ditemukan {len(sheets)} sheet dalam file Excel ini.\n")
+    # read_only: sheet dibaca baris per baris, tidak dimuat utuh ke memori
+    wb = load_workbook(excel_path, read_only=True, data_only=True, keep_links=False)
+    print(f"📚 Ditemukan {len(wb.sheetnames)} sheet dalam file Excel ini.\n")
 
     exported_files = []
-    for sheet_name, df in sheets.items():
-        df = df.dropna(how="all").dropna(axis=1, how="all")
-
-        safe_name = sheet_name.replace("/", "_").replace("\\", "_")
-        output_path = os.path.join(output_dir, f"{safe_name}.csv")
-
-        df.to_csv(output_path, index=False, header=False, encoding="utf-8-sig")
-        exported_files.append(output_path)
-
-        print(f"✅ Sheet '{sheet_name}' berhasil disimpan ke: {output_path}")
+    try:
+        for sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+            # tag <dimension> di banyak workbook hasil generate salah; tanpa reset,
+            # mode read_only bisa memotong baris/kolom diam-diam (pandas juga melakukan ini)
+            ws.reset_dimensions()
+
+            # pass 1: cari kolom yang tidak kosong penuh
+            used_cols = set()
+            for row in ws.iter_rows(values_only=True):
+                used_cols.update(i for i, v in enumerate(row) if v is not None)
+            keep = sorted(used_cols)
+
+            safe_name = sheet_name.replace("/", "_").replace("\\", "_")
+            output_path = os.path.join(output_dir, f"{safe_name}.csv")
+
+            # pass 2: tulis langsung ke CSV, lewati baris kosong penuh
+            with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+                w = csv.writer(f, lineterminator="\n")
+                for row in ws.iter_rows(values_only=True):
+                    if any(v is not None for v in row):
+                        w.writerow([row[i] if i < len(row) else None for i in keep])
+            exported_files.append(output_path)
+
+            print(f"✅ Sheet '{sheet_name}' berhasil disimpan ke: {output_path}")
+    finally:
+        wb.close()
 
     print("\n🎉 Semua sheet telah berhasil diekspor ke CSV!")
     return exported_files
@@ -50,7 +71,7 @@ def combine_csv_exports(output_dir=EXPORT_DIR, output_file=FINAL_OUTPUT):
         print(f"⚠️ Folder {output_dir} belum ada. Jalankan ekspor dulu.")
         return None
 
-    all_dfs = []
+    tables = []
     csv_files = [f for f in os.listdir(output_dir) if f.endswith(".csv")]
 
     if not csv_files:
@@ -59,17 +80,35 @@ def combine_csv_exports(output_dir=EXPORT_DIR, output_file=FINAL_OUTPUT):
 
     print(f"\n🔗 Menggabungkan {len(csv_files)} file CSV...")
 
+    # Parse dengan reader CSV Arrow (C++, multithread) lalu konversi ke pandas sekali di akhir.
+    # Semua kolom dibaca sebagai string agar tipe antar file bisa digabung.
+    read_opts = pacsv.ReadOptions(autogenerate_column_names=True)
+    parse_opts = pacsv.ParseOptions(newlines_in_values=True)
     for file in csv_files:
         path = os.path.join(output_dir, file)
         try:
-            df = pd.read_csv(path, header=None)
-            df = df.dropna(how="all").dropna(axis=1, how="all")
-            df.insert(0, "source_sheet", file)
-            all_dfs.append(df)
+            # nama kolom (f0, f1, ...) diambil dari blok pertama saja
+            with pacsv.open_csv(path, read_options=read_opts, parse_options=parse_opts) as reader:
+                auto_names = reader.schema.names
+            convert_opts = pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in auto_names}, strings_can_be_null=True)
+            table = pacsv.read_csv(path, read_options=read_opts,
+                                   parse_options=parse_opts, convert_options=convert_opts)
+            # f0, f1, ... -> "0", "1", ... (sama seperti header=None di pandas)
+            names = [name[1:] for name in auto_names]
+            table = table.rename_columns(names)
+            # buang kolom yang kosong penuh
+            keep = [name for name in names if table.column(name).null_count < table.num_rows]
+            table = table.select(keep)
+            table = table.add_column(0, "source_sheet", pa.array([file] * table.num_rows, pa.string()))
+            tables.append(table)
         except Exception as e:
             print(f"❌ Gagal membaca {file}: {e}")
 
-    merged = pd.concat(all_dfs, ignore_index=True)
+    merged = pa.concat_tables(tables, promote_options="default").to_pandas()
+    # buang baris yang kosong penuh (selain label source_sheet)
+    data_cols = [c for c in merged.columns if c != "source_sheet"]
+    merged = merged.dropna(how="all", subset=data_cols).reset_index(drop=True)
     merged.insert(0, "timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
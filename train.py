@@ -1,151 +1,455 @@
 import os
+import csv
 import uuid
 import time
+import hashlib
+from functools import lru_cache
 from datetime import datetime
 import numpy as np
 import pandas as pd
-from scipy.integrate import odeint
-import plotly.graph_objects as go
-import plotly.io as pio
-from plotly.subplots import make_subplots
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    # tanpa numba: kernel @njit berjalan sebagai Python biasa dan
+    # simulate_sir memakai solve_ivp (LSODA + Jacobian) sebagai gantinya
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
 
 # lokasi file history
 HISTORY_FILE = os.path.join("data", "history.csv")
 os.makedirs("data", exist_ok=True)
 
+# cache HTML plot per kombinasi parameter
+PLOT_CACHE_DIR = os.path.join("data", "plot_cache")
+# naikkan jika output plot_sir berubah agar cache lama tidak dipakai
+_PLOT_CACHE_VERSION = 4
+
+# urutan kolom history.csv
+FIELDS = ["id", "timestamp", "beta", "gamma", "N", "I0", "R0", "days",
+          "signal", "amp", "freq", "step_time", "peak_I", "peak_day", "final_S", "final_I", "final_R", "summary"]
+
+# dtype eksplisit history.csv (timestamp di-parse lewat parse_dates)
+_HISTORY_DTYPES = {
+    "id": "string", "beta": "float64", "gamma": "float64", "N": "float64",
+    "I0": "float64", "R0": "float64", "days": "Int64", "signal": "string",
+    "amp": "float64", "freq": "float64", "step_time": "float64",
+    "peak_I": "float64", "peak_day": "float64", "final_S": "float64",
+    "final_I": "float64", "final_R": "float64", "summary": "string",
+}
+
+# cache hasil parse history.csv, di-invalidate berdasarkan mtime file
+_HIST_CACHE = {"mtime": None, "df": None}
+
 
 # -----------------------------
 # Control signal generator
 # -----------------------------
-def control_signal(t, signal_type="none", amp=0.5, freq=1.0, step_time=None):
+def _step_vec(t, tmin, tmax, amp, freq, step_time):
+    if step_time is None:
+        step_time = (tmax - tmin) / 2.0
+    return np.where(t >= step_time, 1.0 + amp, 1.0)
+
+
+def _impulse_vec(t, tmin, tmax, amp, freq, step_time):
+    center = (tmax + tmin) / 2.0 if step_time is None else step_time
+    width = max((tmax - tmin) * 0.02, 0.5)
+    return 1.0 + amp * np.exp(-0.5 * ((t - center) / width) ** 2)
+
+
+def _ramp_vec(t, tmin, tmax, amp, freq, step_time):
+    return 1.0 + amp * ((t - tmin) / (tmax - tmin))
+
+
+def _sin_vec(t, tmin, tmax, amp, freq, step_time):
+    # Normalisasi t to [0,1] then multiply freq
+    inv_span = 1.0 / max(1.0, tmax - tmin)
+    return 1.0 + amp * np.sin(2 * np.pi * freq * (t - tmin) * inv_span)
+
+
+def _none_vec(t, tmin, tmax, amp, freq, step_time):
+    return np.ones_like(t)
+
+
+# tabel dispatch tipe sinyal -> fungsi vektor (tipe tak dikenal = "none")
+_SIGNAL_VEC = {"none": _none_vec, "step": _step_vec, "impulse": _impulse_vec,
+               "ramp": _ramp_vec, "sin": _sin_vec}
+
+
+def control_signal_vec(t, signal_type="none", amp=0.5, freq=1.0, step_time=None):
     """
     Menghasilkan faktor skalar u(t) yang mengalikan beta:
       beta_eff = beta * u(t)
 
-    - t: numpy array (waktu)
+    - t: numpy array float, wajib terurut naik (monoton tidak turun); simulate_sir
+      menjamin ini lewat np.linspace. min/max diambil dari t[0]/t[-1] tanpa scan.
     - signal_type: "none","step","impulse","ramp","sin"
     - amp: amplitude relative change (mis. 0.5 -> +50%)
     - freq: frequency (untuk sin)
     - step_time: waktu mulai step (jika None dipilih tengah t)
+
+    Versi skalar untuk integrator ada di _u_scalar.
     """
-    t = np.array(t)
-    if signal_type == "step":
-        if step_time is None:
-            step_time = (t.max() - t.min()) / 2.0
-        return np.where(t >= step_time, 1.0 + amp, 1.0)
-    elif signal_type == "impulse":
-        center = (t.max() + t.min()) / 2.0 if step_time is None else step_time
-        width = max((t.max() - t.min()) * 0.02, 0.5)
-        return 1.0 + amp * np.exp(-0.5 * ((t - center) / width) ** 2)
-    elif signal_type == "ramp":
-        t0 = t.min()
-        t1 = t.max()
-        return 1.0 + amp * ((t - t0) / (t1 - t0))
-    elif signal_type == "sin":
-        # Normalisasi t to [0,1] then multiply freq
-        return 1.0 + amp * np.sin(2 * np.pi * freq * (t - t.min()) / max(1.0, (t.max() - t.min())))
-    else:
-        return np.ones_like(t)
+    assert t.dtype.kind == "f", "t harus numpy array float"
+    # t terurut naik, jadi min/max cukup diambil dari ujung array (O(1))
+    tmin, tmax = t[0], t[-1]
+    assert tmin <= tmax, "t harus terurut naik"
+    fn = _SIGNAL_VEC.get(signal_type, _none_vec)
+    return fn(t, tmin, tmax, amp, freq, step_time)
 
 
 # -----------------------------
 # Model SIR (time-varying beta via control signal)
 # -----------------------------
-def sir_ode(y, t, beta, gamma, N, signal_type="none", amp=0.5, freq=1.0, step_time=None):
+# kode integer untuk tiap tipe sinyal (dipakai di dalam kernel numba)
+_SIGNAL_CODES = {"none": 0, "step": 1, "impulse": 2, "ramp": 3, "sin": 4}
+
+
+@njit(cache=True, fastmath=True)
+def _u_scalar(t, sig_code, amp, freq, step_time, tmin, tmax):
+    """
+    Versi skalar dari control_signal_vec untuk dipanggil di dalam integrator.
+    step_time harus sudah terisi (default diselesaikan oleh simulate_sir).
+    sig_code berasal dari _SIGNAL_CODES (dipetakan sekali di simulate_sir).
+    """
+    if sig_code == 0:
+        return 1.0
+    elif sig_code == 1:
+        return 1.0 + amp if t >= step_time else 1.0
+    elif sig_code == 2:
+        center = step_time
+        width = max((tmax - tmin) * 0.02, 0.5)
+        z = (t - center) / width
+        return 1.0 + amp * np.exp(-0.5 * z * z)
+    elif sig_code == 3:
+        return 1.0 + amp * ((t - tmin) / (tmax - tmin))
+    elif sig_code == 4:
+        inv_span = 1.0 / max(1.0, tmax - tmin)
+        return 1.0 + amp * np.sin(2 * np.pi * freq * (t - tmin) * inv_span)
+    return 1.0
+
+
+# batas langkah internal RK4: h * (laju maksimum) <= _RK4_H_MAX, dan h <= _RK4_MAX_DT hari
+_RK4_H_MAX = 0.2
+_RK4_MAX_DT = 0.5
+# anggaran total langkah RK4 per simulasi; di atas ini (beta/freq ekstrem, sistem kaku)
+# simulate_sir beralih ke solve_ivp LSODA agar satu request tidak memblokir worker
+_RK4_MAX_STEPS = 2_000_000
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_nsub(beta, gamma, amp, freq, sig_code, days, npoints):
+    """
+    Jumlah langkah internal RK4 per interval output (float, belum dibulatkan ke int
+    agar nilai ekstrem tidak overflow saat dibandingkan dengan _RK4_MAX_STEPS).
+    """
+    dt = days / (npoints - 1)
+    # batas atas laju perubahan: beta*u_max + gamma (S/N <= 1), plus frekuensi sinyal sin
+    rate = beta * (1.0 + abs(amp)) + gamma
+    if sig_code == 4:
+        rate += 2 * np.pi * abs(freq) / max(1.0, days)
+    return max(np.ceil(dt * max(rate / _RK4_H_MAX, 1.0 / _RK4_MAX_DT)), 1.0)
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_step(s, i, r, tk, h, beta, gamma, N, sig_code, amp, freq, step_time, tmin, tmax):
+    """
+    Satu langkah RK4 klasik untuk sistem SIR dari tk ke tk + h.
+    """
+    # stage 1
+    be = beta * _u_scalar(tk, sig_code, amp, freq, step_time, tmin, tmax)
+    inf = be * s * i / N
+    ds1 = -inf
+    di1 = inf - gamma * i
+    dr1 = gamma * i
+    # stage 2
+    s2 = s + 0.5 * h * ds1
+    i2 = i + 0.5 * h * di1
+    be = beta * _u_scalar(tk + 0.5 * h, sig_code, amp, freq, step_time, tmin, tmax)
+    inf = be * s2 * i2 / N
+    ds2 = -inf
+    di2 = inf - gamma * i2
+    dr2 = gamma * i2
+    # stage 3
+    s3 = s + 0.5 * h * ds2
+    i3 = i + 0.5 * h * di2
+    inf = be * s3 * i3 / N
+    ds3 = -inf
+    di3 = inf - gamma * i3
+    dr3 = gamma * i3
+    # stage 4
+    s4 = s + h * ds3
+    i4 = i + h * di3
+    be = beta * _u_scalar(tk + h, sig_code, amp, freq, step_time, tmin, tmax)
+    inf = be * s4 * i4 / N
+    ds4 = -inf
+    di4 = inf - gamma * i4
+    dr4 = gamma * i4
+
+    s += h / 6.0 * (ds1 + 2 * ds2 + 2 * ds3 + ds4)
+    i += h / 6.0 * (di1 + 2 * di2 + 2 * di3 + di4)
+    r += h / 6.0 * (dr1 + 2 * dr2 + 2 * dr3 + dr4)
+    return s, i, r
+
+
+@njit(cache=True, fastmath=True)
+def _sir_rk4_njit(beta, gamma, N, S0, I0, R0, days, npoints, sig_code, amp, freq, step_time):
+    """
+    Integrasi model SIR dengan RK4; output pada grid linspace(0, days, npoints).
+    Tiap interval output dibagi menjadi nsub langkah internal sehingga ukuran
+    langkah tidak bergantung pada npoints (stabil untuk beta besar / horizon panjang).
+    Langkah yang melewati diskontinuitas sinyal step dipecah tepat di step_time.
+    u(t) di tiap titik grid ikut dicatat.
+    Akumulator float64, output disimpan sebagai float32 (cukup untuk plot/ringkasan).
+    """
+    S = np.empty(npoints, dtype=np.float32)
+    I = np.empty(npoints, dtype=np.float32)
+    R = np.empty(npoints, dtype=np.float32)
+    U = np.empty(npoints, dtype=np.float32)
+    S[0] = np.float32(S0)
+    I[0] = np.float32(I0)
+    R[0] = np.float32(R0)
+    tmin = 0.0
+    tmax = float(days)
+    dt = tmax / (npoints - 1)
+    nsub = int(_rk4_nsub(beta, gamma, amp, freq, sig_code, tmax, npoints))
+    h = dt / nsub
+    s, i, r = S0, I0, R0
+    for k in range(npoints - 1):
+        t0 = k * dt
+        U[k] = np.float32(_u_scalar(t0, sig_code, amp, freq, step_time, tmin, tmax))
+        for m in range(nsub):
+            tk = t0 + m * h
+            if sig_code == 1 and tk < step_time < tk + h:
+                # sebelum step_time u = 1 (sig_code 0), agar stage akhir tidak membaca nilai setelah lompatan
+                h1 = step_time - tk
+                s, i, r = _rk4_step(s, i, r, tk, h1, beta, gamma, N, 0, amp, freq, step_time, tmin, tmax)
+                s, i, r = _rk4_step(s, i, r, step_time, h - h1, beta, gamma, N,
+                                    sig_code, amp, freq, step_time, tmin, tmax)
+            else:
+                s, i, r = _rk4_step(s, i, r, tk, h, beta, gamma, N, sig_code, amp, freq, step_time, tmin, tmax)
+        S[k + 1] = np.float32(s)
+        I[k + 1] = np.float32(i)
+        R[k + 1] = np.float32(r)
+    U[npoints - 1] = np.float32(_u_scalar(tmax, sig_code, amp, freq, step_time, tmin, tmax))
+    return S, I, R, U
+
+
+def _sir_rhs(t, y, beta, gamma, N, sig_code, amp, freq, step_time, tmax):
     S, I, R = y
-    # compute u(t) at scalar t (control_signal returns vector, so evaluate at t)
-    u = control_signal(np.array(
-        [t]), signal_type=signal_type, amp=amp, freq=freq, step_time=step_time)[0]
-    beta_eff = beta * u
-    dSdt = -beta_eff * S * I / N
-    dIdt = beta_eff * S * I / N - gamma * I
-    dRdt = gamma * I
-    return [dSdt, dIdt, dRdt]
+    be = beta * _u_scalar(t, sig_code, amp, freq, step_time, 0.0, tmax)
+    inf = be * S * I / N
+    return [-inf, inf - gamma * I, gamma * I]
 
 
-def simulate_sir(beta, gamma, N, I0, R0, days=100, npoints=500, signal_type="none", amp=0.5, freq=1.0, step_time=None):
+def _sir_jac(t, y, beta, gamma, N, sig_code, amp, freq, step_time, tmax):
+    S, I, R = y
+    be = beta * _u_scalar(t, sig_code, amp, freq, step_time, 0.0, tmax)
+    return np.array([[-be * I / N, -be * S / N, 0.0],
+                     [be * I / N, be * S / N - gamma, 0.0],
+                     [0.0, gamma, 0.0]])
+
+
+def _sir_solve_ivp(beta, gamma, N, S0, I0, R0, t, sig_code, amp, freq, step_time):
+    """
+    Jalur cadangan (tanpa numba, atau jika RK4 melebihi _RK4_MAX_STEPS):
+    LSODA dengan Jacobian analitik.
+    """
+    from scipy.integrate import solve_ivp
+
+    days = float(t[-1])
+    sol = solve_ivp(_sir_rhs, (0.0, days), [S0, I0, R0], t_eval=t, method="LSODA",
+                    jac=_sir_jac, args=(beta, gamma, N, sig_code, amp, freq, step_time, days))
+    # jika LSODA berhenti lebih awal, sol.y lebih pendek dari t; jangan simpan hasil parsial
+    if not sol.success:
+        raise RuntimeError(sol.message)
+    S, I, R = sol.y.astype(np.float32)
+    return S, I, R
+
+
+@lru_cache(maxsize=128)
+def simulate_sir(beta, gamma, N, I0, R0, days=100, npoints=None, signal_type="none", amp=0.5, freq=1.0, step_time=None):
     """
     Menjalankan simulasi SIR.
-    Returns: t, S, I, R, u (control signal over t)
+    Returns: t, S, I, R, u (control signal over t); S, I, R, u bertipe float32
+
+    npoints hanya menentukan resolusi output (jumlah titik t yang dikembalikan);
+    ukuran langkah integrasi diatur terpisah oleh substep di _sir_rk4_njit.
+    npoints=None -> 5 titik per hari, dibatasi 200..2000 titik output.
+
+    Hasil di-cache per parameter; array yang dikembalikan read-only.
     """
+    if npoints is None:
+        # aman dibatasi karena akurasi tidak lagi bergantung pada jarak grid output
+        npoints = max(200, min(2000, int(days) * 5))
     S0 = max(N - I0 - R0, 0.0)
-    y0 = [S0, I0, R0]
     t = np.linspace(0, days, npoints)
-    # solve ODE with odeint
-    ret = odeint(sir_ode, y0, t, args=(
-        beta, gamma, N, signal_type, amp, freq, step_time))
-    S, I, R = ret.T
-    u = control_signal(t, signal_type=signal_type, amp=amp,
-                       freq=freq, step_time=step_time)
+    sig_code = _SIGNAL_CODES.get(signal_type, 0)
+    # default step_time sama dengan control_signal_vec: tengah rentang t
+    st = float(step_time) if step_time is not None else days / 2.0
+    use_rk4 = HAVE_NUMBA
+    if use_rk4:
+        total_steps = _rk4_nsub(float(beta), float(gamma), float(amp), float(freq),
+                                sig_code, float(days), int(npoints)) * (npoints - 1)
+        use_rk4 = bool(np.isfinite(total_steps)) and total_steps <= _RK4_MAX_STEPS
+    if use_rk4:
+        # solve ODE with RK4 kernel (numba)
+        S, I, R, u = _sir_rk4_njit(float(beta), float(gamma), float(N), float(S0), float(I0), float(R0),
+                                   float(days), int(npoints), sig_code, float(amp), float(freq), st)
+    else:
+        # tanpa numba, atau RK4 melebihi anggaran langkah (beta/freq ekstrem)
+        S, I, R = _sir_solve_ivp(float(beta), float(gamma), float(N), float(S0), float(I0), float(R0),
+                                 t, sig_code, float(amp), float(freq), st)
+        u = control_signal_vec(t, signal_type=signal_type, amp=amp,
+                               freq=freq, step_time=step_time).astype(np.float32)
+    for arr in (t, S, I, R, u):
+        arr.flags.writeable = False
     return t, S, I, R, u
 
 
 # -----------------------------
 # Plotting (Plotly)
 # -----------------------------
+@lru_cache(maxsize=1)
+def _plotly():
+    """
+    Import plotly saat pertama kali dibutuhkan, bukan saat modul di-import,
+    supaya worker yang hanya melayani /history atau /rerun tidak memuatnya.
+    """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    return go, pio
+
+
+@njit(cache=True)
+def _lttb(x, y, threshold=256):
+    """
+    Downsampling Largest-Triangle-Three-Buckets: pilih `threshold` titik yang
+    paling menjaga bentuk kurva (titik pertama dan terakhir selalu dipakai).
+    """
+    n = x.shape[0]
+    if threshold >= n or threshold < 3:
+        return x.copy(), y.copy()
+    x_out = np.empty(threshold, dtype=x.dtype)
+    y_out = np.empty(threshold, dtype=y.dtype)
+    x_out[0] = x[0]
+    y_out[0] = y[0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # rata-rata bucket berikutnya
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(avg_start, avg_end):
+            avg_x += x[j]
+            avg_y += y[j]
+        cnt = avg_end - avg_start
+        avg_x /= cnt
+        avg_y /= cnt
+        # titik di bucket sekarang dengan luas segitiga terbesar
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        best = start
+        max_area = -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > max_area:
+                max_area = area
+                best = j
+        x_out[i + 1] = x[best]
+        y_out[i + 1] = y[best]
+        a = best
+    x_out[threshold - 1] = x[n - 1]
+    y_out[threshold - 1] = y[n - 1]
+    return x_out, y_out
+
+
 def plot_sir(t, S, I, R, u, signal_type, beta, gamma, N):
-    # Buat subplot dengan 2 baris: 1 untuk SIR, 1 untuk kontrol
-    fig = make_subplots(
-        rows=2, cols=1,
-        row_heights=[0.7, 0.3],  # plot atas lebih besar
-        vertical_spacing=0.1,
-        subplot_titles=(
-            f'Populasi HIV (S, I, R)',
-            f'Kontrol Sinyal β(t) - Tipe: {signal_type.upper()}'
-        ),
-        shared_xaxes=True
-    )
-    
-    # Plot 1: Populasi S, I, R
-    fig.add_trace(
-        go.Scatter(x=t, y=S, mode="lines",
-                  name="S (Susceptible)", 
-                  line=dict(color="blue", width=2)),
-        row=1, col=1
-    )
-    fig.add_trace(
-        go.Scatter(x=t, y=I, mode="lines",
-                  name="I (Infected)", 
-                  line=dict(color="red", width=2)),
-        row=1, col=1
-    )
-    fig.add_trace(
-        go.Scatter(x=t, y=R, mode="lines",
-                  name="R (Recovered)", 
-                  line=dict(color="green", width=2)),
-        row=1, col=1
-    )
-    
-    # Plot 2: Kontrol signal
-    fig.add_trace(
-        go.Scatter(x=t, y=u, mode="lines", 
-                  name=f"Sinyal β(t)", 
-                  line=dict(color="orange", width=2, dash="dash")),
-        row=2, col=1
-    )
-    
-    # Update layout
-    fig.update_xaxes(title_text="Waktu (hari)", row=2, col=1)
-    fig.update_yaxes(title_text="Jumlah Populasi", row=1, col=1)
-    fig.update_yaxes(title_text="Faktor β(t)", row=2, col=1,
-                    range=[max(0.0, u.min()*0.95), u.max()*1.05])
-    
-    fig.update_layout(
-        title_text=f"Simulasi Dinamik HIV (Model SIR) - Parameter: β={beta:.3f}, γ={gamma:.3f}, N={int(N)}",
-        title_x=0.5,
-        height=700,
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        hovermode='x unified'
-    )
-    
-    return pio.to_html(fig, full_html=False, include_plotlyjs="cdn")
+    # Figure dibangun langsung sebagai dict (tanpa make_subplots/go.Scatter per trace)
+    # lalu divalidasi sekali lewat go.Figure.
+    # Layout 2 baris: atas SIR (70%), bawah kontrol (30%), sumbu x dipakai bersama.
+    u_min, u_max = float(u.min()), float(u.max())
+    # downsample tiap kurva ke maks. 256 titik sebelum diserialisasi
+    threshold = min(256, len(t))
+    tS, yS = _lttb(t, S, threshold)
+    tI, yI = _lttb(t, I, threshold)
+    tR, yR = _lttb(t, R, threshold)
+    tu, yu = _lttb(t, u, threshold)
+    fig = {
+        "data": [
+            # Plot 1: Populasi S, I, R
+            {"type": "scatter", "x": tS.tolist(), "y": yS.tolist(), "mode": "lines",
+             "name": "S (Susceptible)", "line": {"color": "blue", "width": 2},
+             "xaxis": "x", "yaxis": "y"},
+            {"type": "scatter", "x": tI.tolist(), "y": yI.tolist(), "mode": "lines",
+             "name": "I (Infected)", "line": {"color": "red", "width": 2},
+             "xaxis": "x", "yaxis": "y"},
+            {"type": "scatter", "x": tR.tolist(), "y": yR.tolist(), "mode": "lines",
+             "name": "R (Recovered)", "line": {"color": "green", "width": 2},
+             "xaxis": "x", "yaxis": "y"},
+            # Plot 2: Kontrol signal
+            {"type": "scatter", "x": tu.tolist(), "y": yu.tolist(), "mode": "lines",
+             "name": "Sinyal β(t)", "line": {"color": "orange", "width": 2, "dash": "dash"},
+             "xaxis": "x2", "yaxis": "y2"},
+        ],
+        "layout": {
+            "xaxis": {"anchor": "y", "domain": [0.0, 1.0], "matches": "x2", "showticklabels": False},
+            "yaxis": {"anchor": "x", "domain": [0.37, 1.0], "title": {"text": "Jumlah Populasi"}},
+            "xaxis2": {"anchor": "y2", "domain": [0.0, 1.0], "title": {"text": "Waktu (hari)"}},
+            "yaxis2": {"anchor": "x2", "domain": [0.0, 0.27], "title": {"text": "Faktor β(t)"},
+                       "range": [max(0.0, u_min * 0.95), u_max * 1.05]},
+            "annotations": [
+                {"text": "Populasi HIV (S, I, R)", "x": 0.5, "y": 1.0,
+                 "xref": "paper", "yref": "paper", "xanchor": "center", "yanchor": "bottom",
+                 "showarrow": False, "font": {"size": 16}},
+                {"text": f"Kontrol Sinyal β(t) - Tipe: {signal_type.upper()}", "x": 0.5, "y": 0.27,
+                 "xref": "paper", "yref": "paper", "xanchor": "center", "yanchor": "bottom",
+                 "showarrow": False, "font": {"size": 16}},
+            ],
+            "title": {"text": f"Simulasi Dinamik HIV (Model SIR) - Parameter: β={beta:.3f}, γ={gamma:.3f}, N={int(N)}",
+                      "x": 0.5},
+            "height": 700,
+            "showlegend": True,
+            "legend": {"orientation": "h", "yanchor": "bottom", "y": 1.02, "xanchor": "right", "x": 1},
+            "hovermode": "x unified",
+        },
+    }
+
+    go, pio = _plotly()
+    return pio.to_html(go.Figure(fig), full_html=False, include_plotlyjs="cdn")
+
+
+def plot_sir_cached(beta, gamma, N, I0, R0, days, signal_type="none", amp=0.5, freq=1.0, step_time=None, npoints=None):
+    """
+    Sama seperti simulate_sir + plot_sir, tetapi HTML disimpan di PLOT_CACHE_DIR
+    dengan key SHA-1 dari parameter sehingga kunjungan ulang cukup membaca file.
+    """
+    params = (_PLOT_CACHE_VERSION, float(beta), float(gamma), float(N), float(I0), float(R0), int(days),
+              signal_type, float(amp), float(freq),
+              float(step_time) if step_time is not None else None, npoints)
+    key = hashlib.sha1(repr(params).encode()).hexdigest()
+    path = os.path.join(PLOT_CACHE_DIR, f"{key}.html")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    t, S, I, R, u = simulate_sir(beta, gamma, N, I0, R0, days=days, npoints=npoints,
+                                 signal_type=signal_type, amp=amp, freq=freq, step_time=step_time)
+    plot_html = plot_sir(t, S, I, R, u, signal_type, beta, gamma, N)
+    os.makedirs(PLOT_CACHE_DIR, exist_ok=True)
+    # tulis ke file sementara lalu rename agar worker lain tidak membaca file setengah jadi
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(plot_html)
+    os.replace(tmp_path, path)
+    return plot_html
 
 
 # -----------------------------
@@ -153,8 +457,7 @@ def plot_sir(t, S, I, R, u, signal_type, beta, gamma, N):
 # -----------------------------
 def _ensure_history():
     if not os.path.exists(HISTORY_FILE):
-        df = pd.DataFrame(columns=["id", "timestamp", "beta", "gamma", "N", "I0", "R0", "days",
-                                   "signal", "amp", "freq", "step_time", "peak_I", "peak_day", "final_S", "final_I", "final_R", "summary"])
+        df = pd.DataFrame(columns=FIELDS)
         df.to_csv(HISTORY_FILE, index=False)
     else:
         # Jika file ada tapi kosong atau hanya header, buat ulang dengan header
@@ -166,8 +469,7 @@ def _ensure_history():
                     lines = f.readlines()
                 # Jika hanya 1 baris atau kurang, anggap hanya header
                 if len(lines) <= 1:
-                    df = pd.DataFrame(columns=["id", "timestamp", "beta", "gamma", "N", "I0", "R0", "days",
-                                               "signal", "amp", "freq", "step_time", "peak_I", "peak_day", "final_S", "final_I", "final_R", "summary"])
+                    df = pd.DataFrame(columns=FIELDS)
                     df.to_csv(HISTORY_FILE, index=False)
         except Exception:
             pass
@@ -176,9 +478,9 @@ def _ensure_history():
 def save_history_entry(beta, gamma, N, I0, R0, days, signal_type, amp=0.5, freq=1.0, step_time=None, summary_text=None, peak_I=None, peak_day=None, final_S=None, final_I=None, final_R=None):
     """
     Tambahkan satu baris ke history.csv dengan id unik.
+    Statistik hasil simulasi berasal dari array float32 (lihat generate_summary).
     """
     _ensure_history()
-    df = pd.read_csv(HISTORY_FILE)
     # generate id based on uuid to avoid collisions
     entry_id = str(uuid.uuid4())
     ts = datetime.utcnow().isoformat()
@@ -202,19 +504,41 @@ def save_history_entry(beta, gamma, N, I0, R0, days, signal_type, amp=0.5, freq=
         "final_R": final_R,
         "summary": summary_text if summary_text is not None else ""
     }
-    df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
-    df.to_csv(HISTORY_FILE, index=False)
+    # append satu baris saja, tanpa membaca ulang seluruh file
+    new_file = not os.path.exists(HISTORY_FILE) or os.path.getsize(HISTORY_FILE) == 0
+    with open(HISTORY_FILE, "a", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=FIELDS, lineterminator="\n")
+        if new_file:
+            w.writeheader()
+        w.writerow(record)
+    _HIST_CACHE["mtime"] = None
     return entry_id
 
 
 def load_history_df():
+    """
+    Baca history.csv; hasil parse di-cache selama mtime file tidak berubah.
+    """
     _ensure_history()
-    df = pd.read_csv(HISTORY_FILE)
+    cur = os.path.getmtime(HISTORY_FILE)
+    if cur == _HIST_CACHE["mtime"]:
+        return _HIST_CACHE["df"].copy(deep=False)
+    df = pd.read_csv(HISTORY_FILE, dtype=_HISTORY_DTYPES,
+                     parse_dates=["timestamp"], engine="c")
     # Jika file kosong atau hanya header, return DataFrame kosong dengan kolom yang benar
     if df.empty:
-        return pd.DataFrame(columns=["id", "timestamp", "beta", "gamma", "N", "I0", "R0", "days",
-                                     "signal", "amp", "freq", "step_time", "peak_I", "peak_day", "final_S", "final_I", "final_R", "summary"])
-    return df
+        df = pd.DataFrame(columns=FIELDS + ["timestamp_readable"])
+    else:
+        # format timestamp sekali saat cache diisi, bukan per request;
+        # datetime64[s] -> "YYYY-MM-DDTHH:MM:SS" lalu ganti "T" secara vektor (tanpa strftime per baris)
+        ts = df["timestamp"].to_numpy()
+        valid = df["timestamp"].notna().to_numpy()
+        readable = np.full(len(df), None, dtype=object)
+        readable[valid] = np.char.replace(ts[valid].astype("datetime64[s]").astype(str), "T", " ")
+        df["timestamp_readable"] = readable
+    _HIST_CACHE["mtime"] = cur
+    _HIST_CACHE["df"] = df
+    return df.copy(deep=False)
 
 
 def get_history_entry(entry_id):
@@ -232,14 +556,16 @@ def generate_summary(beta, gamma, N, I0, R0, days, t, S, I, R, u, signal_type):
     """
     Buat ringkasan deskriptif otomatis berdasarkan output simulasi.
     Mengembalikan text summary dan beberapa statistik (peak, final).
+
+    Catatan: S, I, R dari simulate_sir bertipe float32, sehingga statistik
+    (peak_I, final_S, ...) yang disimpan ke history dibulatkan ke presisi
+    float32 (~7 digit signifikan; mis. final_S=14458.1806640625) dan angka
+    bulat di teks ringkasan bisa bergeser ±1 dibanding hasil float64.
     """
-    # basic stats
-    peak_idx = int(np.nanargmax(I))
-    peak_I = float(I[peak_idx])
-    peak_day = float(t[peak_idx])
-    final_S = float(S[-1])
-    final_I = float(I[-1])
-    final_R = float(R[-1])
+    # basic stats (output integrator tidak mengandung NaN, jadi tanpa varian nan*)
+    peak_idx = int(I.argmax())
+    peak_I, peak_day = float(I[peak_idx]), float(t[peak_idx])
+    final_S, final_I, final_R = float(S[-1]), float(I[-1]), float(R[-1])
 
     R0_basic = beta / gamma if gamma != 0 else float("inf")
 
@@ -268,8 +594,8 @@ def generate_summary(beta, gamma, N, I0, R0, days, t, S, I, R, u, signal_type):
     # effect of control signal
     if signal_type and signal_type != "none":
         # check how u changes: if u peaks >>1 means increase in beta
-        mean_u = float(np.nanmean(u))
-        max_u = float(np.nanmax(u))
+        mean_u = float(u.mean())
+        max_u = float(u.max())
         if max_u > 1.05:
             lines.append(
                 f"Efek sinyal ({signal_type}): sinyal meningkatkan β sementara (max factor {max_u:.2f}), mempengaruhi kurva I(t).")
@@ -297,7 +623,12 @@ def generate_summary(beta, gamma, N, I0, R0, days, t, S, I, R, u, signal_type):
 # -----------------------------
 # High level helper: run + save
 # -----------------------------
-def run_simulation_and_save(beta, gamma, N, I0, R0, days=100, signal_type="none", amp=0.5, freq=1.0, step_time=None, npoints=500):
+def run_simulation_and_save(beta, gamma, N, I0, R0, days=100, signal_type="none", amp=0.5, freq=1.0, step_time=None, npoints=None, render_plot=True):
+    """
+    Jalankan simulasi, simpan ke history, dan (opsional) render plot.
+    Dengan render_plot=False, plot_html bernilai None; plot bisa dibuat
+    belakangan lewat plot_sir_cached.
+    """
     t, S, I, R, u = simulate_sir(beta, gamma, N, I0, R0, days=days, npoints=npoints,
                                  signal_type=signal_type, amp=amp, freq=freq, step_time=step_time)
     summary_text, stats = generate_summary(
@@ -307,8 +638,28 @@ def run_simulation_and_save(beta, gamma, N, I0, R0, days=100, signal_type="none"
                                   signal_type=signal_type, amp=amp, freq=freq, step_time=step_time,
                                   summary_text=summary_text, peak_I=stats["peak_I"], peak_day=stats["peak_day"],
                                   final_S=stats["final_S"], final_I=stats["final_I"], final_R=stats["final_R"])
-    plot_html = plot_sir(t, S, I, R, u, signal_type, beta, gamma, N)
+    plot_html = None
+    if render_plot:
+        plot_html = plot_sir_cached(beta, gamma, N, I0, R0, days, signal_type=signal_type,
+                                    amp=amp, freq=freq, step_time=step_time, npoints=npoints)
     return {"id": entry_id, "t": t, "S": S, "I": I, "R": R, "u": u, "summary": summary_text, "plot_html": plot_html, "stats": stats}
 
 
+# -----------------------------
+# Warm-up kernel numba
+# -----------------------------
+def _warmup():
+    """
+    Panggil kernel numba sekali saat import agar kompilasi (atau pemuatan
+    cache=True dari __pycache__) terjadi sebelum request pertama.
+    Dipanggil lewat __wrapped__ supaya lru_cache simulate_sir tidak terisi data dummy.
+    """
+    try:
+        t, S, I, R, u = simulate_sir.__wrapped__(0.3, 0.1, 1e6, 10, 0, days=10, npoints=32, signal_type="none")
+        _lttb(t, I, 16)
+    except Exception:
+        pass
+
 
+if HAVE_NUMBA:
+    _warmup()